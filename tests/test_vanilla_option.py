@@ -0,0 +1,64 @@
+"""Regression tests for the Black-Scholes vanilla option functions."""
+import math
+
+import pytest
+import torch
+
+from torch_qf.options.black_scholes.vanilla_option import (
+    _ndtr_poly, get_vanilla_prices)
+
+
+def test_put_call_parity():
+    # call - put == df * (F - K), to 1e-5 in FP32
+    strikes = torch.tensor([80.0, 100.0, 120.0, 150.0])
+    volatilities = torch.tensor([0.1, 0.2, 0.3, 0.4])
+    expiries = torch.tensor([0.5, 1.0, 1.5, 2.0])
+    forwards = torch.full((4,), 100.0)
+    discount_rates = torch.tensor([0.01, 0.02, 0.03, 0.04])
+
+    kwargs = dict(strikes=strikes, volatilities=volatilities,
+                  expiries=expiries, forwards=forwards,
+                  discount_rates=discount_rates, dtype=torch.float32)
+    calls = get_vanilla_prices(is_call_options=True, **kwargs)
+    puts = get_vanilla_prices(is_call_options=False, **kwargs)
+
+    discount_factors = torch.exp(-discount_rates * expiries)
+    parity = discount_factors * (forwards - strikes)
+    assert torch.allclose(calls - puts, parity, atol=1e-5)
+
+
+def test_put_call_parity_degenerate_rows():
+    # parity must also hold on the zero-vol / zero-expiry intrinsic branch
+    strikes = torch.tensor([80.0, 120.0])
+    volatilities = torch.tensor([0.0, 0.2])
+    expiries = torch.tensor([1.0, 0.0])
+    forwards = torch.full((2,), 100.0)
+
+    kwargs = dict(strikes=strikes, volatilities=volatilities,
+                  expiries=expiries, forwards=forwards, dtype=torch.float32)
+    calls = get_vanilla_prices(is_call_options=True, **kwargs)
+    puts = get_vanilla_prices(is_call_options=False, **kwargs)
+
+    assert not torch.isnan(calls).any()
+    assert not torch.isnan(puts).any()
+    assert torch.allclose(calls - puts, forwards - strikes, atol=1e-5)
+
+
+def test_ndtr_poly_matches_ndtr():
+    # the Abramowitz-Stegun polynomial must agree with the exact CDF on
+    # both sides of zero - the mirroring for x < 0 is the classic bug
+    x = torch.linspace(-6.0, 6.0, 121, dtype=torch.float64)
+    approx = _ndtr_poly(x)
+    exact = torch.special.ndtr(x)
+    assert torch.allclose(approx, exact, atol=1e-6)
+    assert torch.allclose(approx + _ndtr_poly(-x), torch.ones_like(x),
+                          atol=1e-6)
+
+
+def test_numba_norm_cdf_scalar_sign():
+    _bs_numba = pytest.importorskip(
+        'torch_qf.options.black_scholes._bs_numba')
+    for x in (-3.0, -1.0, -0.25, 0.0, 0.25, 1.0, 3.0):
+        exact = 0.5 * math.erfc(-x / math.sqrt(2.0))
+        assert _bs_numba._norm_cdf_scalar(x) == pytest.approx(exact, abs=1e-6)
+        assert _bs_numba._norm_cdf_erfc(x) == pytest.approx(exact, abs=1e-12)
@@ -1,26 +1,58 @@
 """Functions that get the price and greeks of Vanilla options based on Black-Scholes"""
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import torch
-import math
-from scipy.stats import norm
+import warnings
+import functools
+from dataclasses import dataclass
+from typing import Tuple
 
-pi = 3.14159265359
+try:
+    from . import _bs_numba
+except ImportError:
+    _bs_numba = None
 
-def get_vanilla_prices(*,
-                     strikes,
-                     volatilities,
-                     expiries,
-                     spots=None,
-                     forwards=None,
-                     discount_rates=None,
-                     continuous_dividends=None,
-                     cost_of_carries=None,
-                     discount_factors=None,
-                     is_call_options=True):
+_INV_SQRT_2PI = 0.3989422804014327  # 1 / sqrt(2 * pi)
+_DEGENERATE_EPS = 1e-12  # sigma * sqrt(T) at or below this prices at intrinsic
+
+_copy_stream = None
+
+def _upload(x, device, dtype=None):
     '''
-    Computes the Black Scholes price for a batch of call or put options.
+    Moves host data to a CUDA device through a pinned staging buffer with a
+    non-blocking copy enqueued on a dedicated stream, so the transfer can
+    overlap whatever kernel the compute stream is still running. The
+    compute stream is synchronized with the copy stream before returning,
+    which keeps the result safe to use immediately.
+    '''
+    global _copy_stream
+    t = torch.as_tensor(x, dtype=dtype)
+    if t.device.type == 'cuda':
+        # Already device-resident: .to() is a no-op when the device
+        # matches (e.g. 'cuda' vs 'cuda:0') and a device-to-device copy
+        # otherwise. Pinning host memory would raise here.
+        return t.to(device, non_blocking=True)
+    if _copy_stream is None:
+        _copy_stream = torch.cuda.Stream(device=device)
+    with torch.cuda.stream(_copy_stream):
+        t_device = t.pin_memory().to(device, non_blocking=True)
+    torch.cuda.current_stream(device).wait_stream(_copy_stream)
+    return t_device
+
+def _as_tensor(x, device=None, dtype=None):
+    '''
+    Converts x to a tensor on the requested device/dtype, avoiding a copy
+    when x is already a matching tensor. Host-to-CUDA conversions go
+    through the pinned-memory async path in _upload.
+    '''
+    if (device is not None and torch.device(device).type == 'cuda'
+            and torch.cuda.is_available()):
+        return _upload(x, device, dtype)
+    return torch.as_tensor(x, device=device, dtype=dtype)
+
+def _validate_args(spots, forwards, discount_rates, continuous_dividends,
+                   cost_of_carries, discount_factors):
+    '''
+    Checks the mutually exclusive argument pairs shared by every entry point.
     '''
     if (spots is None) == (forwards is None):
         raise ValueError('Either spots or forwards must be supplied but not both.')
@@ -29,165 +61,572 @@ def get_vanilla_prices(*,
     if (continuous_dividends is not None) and (cost_of_carries is not None):
         raise ValueError('At most one of continuous_dividends and cost_of_carries may be supplied')
 
-    t_strikes = torch.Tensor(strikes)
-    t_volatilities = torch.Tensor(volatilities)
-    t_expiries = torch.Tensor(expiries)
+@functools.lru_cache(maxsize=32)
+def _make_prep(has_spots, has_forwards, has_discount_rates,
+               has_continuous_dividends, has_cost_of_carries,
+               has_discount_factors):
+    '''
+    Builds (and caches) a prep function specialized to one argument
+    signature. Validation runs here, once per signature; the returned
+    closure is straight-line with the branch structure already resolved,
+    so calibration loops reusing the same signature skip the per-call
+    branching.
+    '''
+    if has_spots == has_forwards:
+        raise ValueError('Either spots or forwards must be supplied but not both.')
+    if has_discount_rates and has_discount_factors:
+        raise ValueError('At most one of discount_rates and discount_factors may be supplied')
+    if has_continuous_dividends and has_cost_of_carries:
+        raise ValueError('At most one of continuous_dividends and cost_of_carries may be supplied')
 
-    if discount_rates is not None:
-        t_discount_rates = torch.Tensor(discount_rates)
-    elif discount_factors is not None:
-        t_discount_rates = -torch.log(discount_factors) / expiries
+    if has_discount_rates:
+        def _rates(t_volatilities, t_expiries, discount_rates, discount_factors, device, dtype):
+            return _as_tensor(discount_rates, device, dtype)
+    elif has_discount_factors:
+        def _rates(t_volatilities, t_expiries, discount_rates, discount_factors, device, dtype):
+            return -torch.log(_as_tensor(discount_factors, device, dtype)) \
+                   / torch.clamp_min(t_expiries, _DEGENERATE_EPS)
     else:
-        t_discount_rates = torch.zeros_like(t_volatilities)
+        def _rates(t_volatilities, t_expiries, discount_rates, discount_factors, device, dtype):
+            return torch.zeros_like(t_volatilities)
 
-    if continuous_dividends is None:
-        t_continuous_dividends = torch.zeros_like(t_volatilities)
+    if has_cost_of_carries:
+        def _carries(t_discount_rates, continuous_dividends, cost_of_carries, device, dtype):
+            return _as_tensor(cost_of_carries, device, dtype)
+    elif has_continuous_dividends:
+        def _carries(t_discount_rates, continuous_dividends, cost_of_carries, device, dtype):
+            return t_discount_rates - _as_tensor(continuous_dividends, device, dtype)
+    else:
+        def _carries(t_discount_rates, continuous_dividends, cost_of_carries, device, dtype):
+            return t_discount_rates
 
-    if cost_of_carries is not None:
-        t_cost_of_carries = torch.Tensor(cost_of_carries)
+    if has_discount_factors:
+        def _factors(t_discount_rates, t_expiries, discount_factors, device, dtype):
+            return _as_tensor(discount_factors, device, dtype)
     else:
-        t_cost_of_carries = t_discount_rates - t_continuous_dividends
+        def _factors(t_discount_rates, t_expiries, discount_factors, device, dtype):
+            return torch.exp(-t_discount_rates * t_expiries)
 
-    if discount_factors is not None:
-        t_discount_factors = torch.Tensor(discount_factors)
+    if has_forwards:
+        def _underliers(t_cost_of_carries, t_expiries, spots, forwards, device, dtype):
+            t_forwards = _as_tensor(forwards, device, dtype)
+            return t_forwards * torch.exp(-t_cost_of_carries * t_expiries), t_forwards
     else:
-        t_discount_factors = torch.exp(-t_discount_rates * t_expiries)
+        def _underliers(t_cost_of_carries, t_expiries, spots, forwards, device, dtype):
+            t_spots = _as_tensor(spots, device, dtype)
+            return t_spots, t_spots * torch.exp(t_cost_of_carries * t_expiries)
 
-    if forwards is not None:
-        t_forwards = torch.Tensor(forwards)
-        t_spots * torch.exp(-t_cost_of_carries * t_expiries)
+    def prep(strikes, volatilities, expiries, spots, forwards, discount_rates,
+             continuous_dividends, cost_of_carries, discount_factors, device, dtype):
+        t_strikes = _as_tensor(strikes, device, dtype)
+        t_volatilities = _as_tensor(volatilities, device, dtype)
+        t_expiries = _as_tensor(expiries, device, dtype)
+        t_discount_rates = _rates(t_volatilities, t_expiries, discount_rates,
+                                  discount_factors, device, dtype)
+        t_cost_of_carries = _carries(t_discount_rates, continuous_dividends,
+                                     cost_of_carries, device, dtype)
+        t_discount_factors = _factors(t_discount_rates, t_expiries,
+                                      discount_factors, device, dtype)
+        t_spots, t_forwards = _underliers(t_cost_of_carries, t_expiries,
+                                          spots, forwards, device, dtype)
+        return (t_strikes, t_volatilities, t_expiries, t_discount_rates,
+                t_cost_of_carries, t_discount_factors, t_spots, t_forwards)
+
+    return prep
+
+def _prep(strikes, volatilities, expiries, spots, forwards, discount_rates,
+          continuous_dividends, cost_of_carries, discount_factors, device, dtype):
+    '''
+    Validates the mutually exclusive inputs and normalizes everything into
+    tensors via the cached signature-specialized prep.
+    '''
+    prep = _make_prep(spots is not None, forwards is not None,
+                      discount_rates is not None,
+                      continuous_dividends is not None,
+                      cost_of_carries is not None,
+                      discount_factors is not None)
+    return prep(strikes, volatilities, expiries, spots, forwards,
+                discount_rates, continuous_dividends, cost_of_carries,
+                discount_factors, device, dtype)
+
+@dataclass
+class _BSContext:
+    '''
+    Normalized input tensors plus the log/sqrt/exp invariants of the
+    Black Scholes formulas, precomputed once. Build with bs_context and
+    pass as context= to price/greek calls to amortize the transcendental
+    cost across many queries on the same grid.
+    '''
+    strikes: torch.Tensor
+    volatilities: torch.Tensor
+    expiries: torch.Tensor
+    discount_rates: torch.Tensor
+    cost_of_carries: torch.Tensor
+    discount_factors: torch.Tensor
+    spots: torch.Tensor
+    forwards: torch.Tensor
+    sqrt_expiries: torch.Tensor
+    log_strikes: torch.Tensor
+    log_forwards: torch.Tensor
+    carry_discount: torch.Tensor
+
+def bs_context(*,
+               strikes,
+               volatilities,
+               expiries,
+               spots=None,
+               forwards=None,
+               discount_rates=None,
+               continuous_dividends=None,
+               cost_of_carries=None,
+               discount_factors=None,
+               device=None,
+               dtype=None):
+    '''
+    Normalizes the inputs and precomputes sqrt(T), log(K), log(F) and
+    exp(-b*T) once. Reusing the returned context across repeated price or
+    greek queries (IV surfaces, finite-difference calibration) skips the
+    most expensive transcendentals on every call after the first.
+    '''
+    (t_strikes, t_volatilities, t_expiries, t_discount_rates,
+     t_cost_of_carries, t_discount_factors, t_spots, t_forwards) = _prep(
+        strikes, volatilities, expiries, spots, forwards, discount_rates,
+        continuous_dividends, cost_of_carries, discount_factors, device, dtype)
+    return _BSContext(
+        strikes=t_strikes, volatilities=t_volatilities, expiries=t_expiries,
+        discount_rates=t_discount_rates, cost_of_carries=t_cost_of_carries,
+        discount_factors=t_discount_factors, spots=t_spots,
+        forwards=t_forwards, sqrt_expiries=torch.sqrt(t_expiries),
+        log_strikes=torch.log(t_strikes), log_forwards=torch.log(t_forwards),
+        carry_discount=torch.exp(-t_cost_of_carries * t_expiries))
+
+@torch.jit.script
+def _ndtr_poly(x: torch.Tensor) -> torch.Tensor:
+    '''
+    Abramowitz-Stegun 26.2.17 normal CDF (max abs error ~7.5e-8). Built
+    from mul/add/exp only, so it fuses into the surrounding kernel with no
+    specialized transcendental - useful on launch-overhead-dominated small
+    batches. The polynomial is evaluated on |x| and mirrored for x < 0.
+    '''
+    t = 1.0 / (1.0 + 0.2316419 * torch.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 +
+               t * (-1.821255978 + t * 1.330274429))))
+    tail = poly * torch.exp(-0.5 * x * x) * _INV_SQRT_2PI
+    return torch.where(x >= 0, 1.0 - tail, tail)
+
+@torch.jit.script
+def _bs_price_core(t_strikes: torch.Tensor,
+                   t_volatilities: torch.Tensor,
+                   t_sqrt_expiries: torch.Tensor,
+                   t_discount_factors: torch.Tensor,
+                   t_forwards: torch.Tensor,
+                   t_log_moneyness: torch.Tensor,
+                   is_call: torch.Tensor,
+                   use_poly_cdf: bool) -> torch.Tensor:
+    '''
+    Pure-tensor Black Scholes price. TorchScript fuses the elementwise
+    log/sqrt/mul/exp/ndtr chain into far fewer kernels. is_call is a
+    broadcastable bool mask, so mixed call/put books price in one pass.
+    Rows with sigma*sqrt(T) ~ 0 fall back to discounted intrinsic value
+    instead of dividing by zero.
+    '''
+    t_sqrt_var = t_volatilities * t_sqrt_expiries
+    degenerate = t_sqrt_var <= _DEGENERATE_EPS
+    t_safe_sqrt_var = torch.where(degenerate, torch.ones_like(t_sqrt_var), t_sqrt_var)
+    d1 = (t_log_moneyness + 0.5 * t_sqrt_var * t_sqrt_var) * torch.reciprocal(t_safe_sqrt_var)
+    d2 = d1 - t_sqrt_var
+    if use_poly_cdf:
+        t_undiscounted_calls = t_forwards * _ndtr_poly(d1) - t_strikes * _ndtr_poly(d2)
     else:
-        t_spots = torch.Tensor(spots)
-        t_forwards = t_spots * torch.exp(t_cost_of_carries * t_expiries)
+        t_undiscounted_calls = t_forwards * torch.special.ndtr(d1) - t_strikes * torch.special.ndtr(d2)
+    t_undiscounted_puts = t_undiscounted_calls - (t_forwards - t_strikes)
+    t_intrinsic = torch.clamp_min(
+        torch.where(is_call, t_forwards - t_strikes, t_strikes - t_forwards), 0.)
+    return t_discount_factors * torch.where(
+        degenerate, t_intrinsic,
+        torch.where(is_call, t_undiscounted_calls, t_undiscounted_puts))
 
-    t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-    d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
+@torch.jit.script
+def _bs_greeks_core(t_strikes: torch.Tensor,
+                    t_volatilities: torch.Tensor,
+                    t_expiries: torch.Tensor,
+                    t_sqrt_expiries: torch.Tensor,
+                    t_cost_of_carries: torch.Tensor,
+                    t_carry_discount: torch.Tensor,
+                    t_spots: torch.Tensor,
+                    t_log_moneyness: torch.Tensor,
+                    is_call: torch.Tensor,
+                    use_poly_cdf: bool
+                    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    '''
+    Pure-tensor computation of (delta, gamma, theta, vega, rho) from one
+    shared d1/d2/pdf pass. Rows with sigma*sqrt(T) ~ 0 take their limit
+    values (step-function deltas, zero gamma/vega) instead of NaN.
+    '''
+    t_sqrt_var = t_volatilities * t_sqrt_expiries
+    degenerate = t_sqrt_var <= _DEGENERATE_EPS
+    inv_sqrt_var = torch.reciprocal(
+        torch.where(degenerate, torch.ones_like(t_sqrt_var), t_sqrt_var))
+    d1 = (t_log_moneyness + 0.5 * t_sqrt_var * t_sqrt_var) * inv_sqrt_var
     d2 = d1 - t_sqrt_var
-    t_undiscounted_calls = t_forwards * torch.Tensor(norm.cdf(d1)) - t_strikes * torch.Tensor(norm.cdf(d2))
-    if is_call_options == True:
-        return t_discount_factors * t_undiscounted_calls
+    neg_half_d1_sq = -0.5 * d1 * d1
+    t_exp_d1 = torch.where(degenerate, torch.zeros_like(d1), torch.exp(neg_half_d1_sq))
+    pdf_d1 = t_exp_d1 * _INV_SQRT_2PI
+    if use_poly_cdf:
+        n_d1 = _ndtr_poly(d1)
+        n_d2 = _ndtr_poly(d2)
+        n_minus_d2 = _ndtr_poly(-d2)
     else:
-        t_undiscounted_forward = t_forwards - t_strikes
-        t_undiscounted_puts = t_undiscounted_calls - t_undiscounted_forward
-        return discount_factors * t_undiscounted_puts
+        n_d1 = torch.special.ndtr(d1)
+        n_d2 = torch.special.ndtr(d2)
+        n_minus_d2 = torch.special.ndtr(-d2)
+    # In the degenerate limit d1 and d2 collapse to +/-inf depending on
+    # moneyness, so the CDFs become the exercise indicator.
+    t_exercise = (t_log_moneyness > 0).to(d1.dtype)
+    n_d1 = torch.where(degenerate, t_exercise, n_d1)
+    n_d2 = torch.where(degenerate, t_exercise, n_d2)
+    n_minus_d2 = torch.where(degenerate, 1 - t_exercise, n_minus_d2)
 
+    delta = torch.where(is_call, n_d1, n_d1 - 1)
+    gamma = pdf_d1 * inv_sqrt_var / t_spots
+    t_time_decay = t_spots * t_volatilities * t_volatilities * pdf_d1 * inv_sqrt_var
+    t_call_carry = t_cost_of_carries * t_strikes * t_carry_discount * n_d2
+    t_put_carry = t_cost_of_carries * t_strikes * t_carry_discount * n_minus_d2
+    theta = torch.where(is_call, t_time_decay - t_call_carry, t_put_carry - t_time_decay)
+    vega = t_spots * t_sqrt_expiries * t_exp_d1
+    t_call_rho = t_strikes * t_expiries * t_carry_discount * n_d2
+    t_put_rho = -t_strikes * t_expiries * t_carry_discount * n_minus_d2
+    rho = torch.where(is_call, t_call_rho, t_put_rho)
+    return delta, gamma, theta, vega, rho
 
-def get_vanilla_greeks(*,
-                       strikes,
-                       volatilities,
-                       expiries,
-                       greek,
-                       spots=None,
-                       forwards=None,
-                       discount_rates=None,
-                       continuous_dividends=None,
-                       cost_of_carries=None,
-                       discount_factors=None,
-                       is_call_options=True):
+def _bs_price_chunked(t_strikes, t_volatilities, t_sqrt_expiries,
+                      t_discount_factors, t_forwards, t_log_moneyness,
+                      is_call, use_poly_cdf, chunk_size):
     '''
-    Computes the Greeks of a batch of call or put plain vanilla options.
+    Prices the batch in chunk_size blocks so every intermediate of the
+    sqrt/log/exp/ndtr chain stays resident in L2 instead of streaming
+    ~8 full-size temporaries through DRAM. Only worthwhile on CPU.
     '''
-    if greek not in ['delta', 'gamma', 'theta', 'vega', 'rho']:
-        raise ValueError('Input greek should be one of \'delta\',\'gamma\',\'theta\',\'vega\',\'rho\'')
-    if (spots is None) == (forwards is None):
-        raise ValueError('Either spots or forwards must be supplied but not both.')
-    if (discount_rates is not None) and (discount_factors is not None):
-        raise ValueError('At most one of discount_rates and discount_factors may be supplied')
-    if (continuous_dividends is not None) and (cost_of_carries is not None):
-        raise ValueError('At most one of continuous_dividends and cost_of_carries may be supplied')
+    (t_strikes, t_volatilities, t_sqrt_expiries, t_discount_factors,
+     t_forwards, t_log_moneyness, is_call) = torch.broadcast_tensors(
+        t_strikes, t_volatilities, t_sqrt_expiries, t_discount_factors,
+        t_forwards, t_log_moneyness, is_call)
+    shape = t_strikes.shape
+    flat = [t.reshape(-1) for t in (t_strikes, t_volatilities,
+                                    t_sqrt_expiries, t_discount_factors,
+                                    t_forwards, t_log_moneyness, is_call)]
+    n = flat[0].numel()
+    out = None
+    for start in range(0, n, chunk_size):
+        sl = slice(start, start + chunk_size)
+        block = _bs_price_core(flat[0][sl], flat[1][sl], flat[2][sl],
+                               flat[3][sl], flat[4][sl], flat[5][sl],
+                               flat[6][sl], use_poly_cdf)
+        if out is None:
+            # Allocate with the promoted dtype of the computed block so
+            # mixed-precision inputs give the same result chunked or not.
+            out = torch.empty(n, dtype=block.dtype, device=block.device)
+        out[sl] = block
+    return out.reshape(shape)
 
-    t_strikes = torch.Tensor(strikes)
-    t_volatilities = torch.Tensor(volatilities)
-    t_expiries = torch.Tensor(expiries)
+def _vanilla_prices_numba(strikes, volatilities, expiries, spots, forwards,
+                          discount_rates, continuous_dividends,
+                          cost_of_carries, discount_factors, is_call,
+                          use_poly_cdf):
+    '''
+    NumPy/Numba mirror of the torch pricing path for CPU-bound batches.
+    '''
+    out_dtype = torch.float32 if strikes.dtype == np.float32 else torch.float64
+    strikes = np.asarray(strikes, dtype=np.float64)
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    expiries = np.asarray(expiries, dtype=np.float64)
 
     if discount_rates is not None:
-        t_discount_rates = torch.Tensor(discount_rates)
+        discount_rates = np.asarray(discount_rates, dtype=np.float64)
     elif discount_factors is not None:
-        t_discount_rates = -torch.log(discount_factors) / expiries
+        discount_rates = -np.log(np.asarray(discount_factors, dtype=np.float64)) \
+                         / np.maximum(expiries, 1e-12)
     else:
-        t_discount_rates = torch.zeros_like(t_volatilities)
-
-    if continuous_dividends is None:
-        t_continuous_dividends = torch.zeros_like(t_volatilities)
+        discount_rates = np.zeros_like(volatilities)
 
     if cost_of_carries is not None:
-        t_cost_of_carries = torch.Tensor(cost_of_carries)
+        cost_of_carries = np.asarray(cost_of_carries, dtype=np.float64)
+    elif continuous_dividends is not None:
+        cost_of_carries = discount_rates - np.asarray(continuous_dividends, dtype=np.float64)
     else:
-        t_cost_of_carries = t_discount_rates - t_continuous_dividends
+        cost_of_carries = discount_rates
 
     if discount_factors is not None:
-        t_discount_factors = torch.Tensor(discount_factors)
+        discount_factors = np.asarray(discount_factors, dtype=np.float64)
     else:
-        t_discount_factors = torch.exp(-t_discount_rates * t_expiries)
+        discount_factors = np.exp(-discount_rates * expiries)
 
     if forwards is not None:
-        t_forwards = torch.Tensor(forwards)
-        t_spots = t_forwards * torch.exp(-t_cost_of_carries * t_expiries)
+        forwards = np.asarray(forwards, dtype=np.float64)
     else:
-        t_spots = torch.Tensor(spots)
-        t_forwards = t_spots * torch.exp(t_cost_of_carries * t_expiries)
-
-    if is_call_options == True:
-        if greek == 'delta':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            delta = torch.Tensor(norm.cdf(d1))
-            return delta
-        if greek == 'gamma':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            gamma = (torch.exp(-d1 ** 2 / 2)) / (torch.sqrt(2 * pi * (t_expiries)) * t_spots * t_volatilities)
-            return gamma
-        if greek == 'theta':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            d2 = d1 - t_sqrt_var
-            theta = t_spots * t_volatilities * (torch.exp(-d1 ** 2 / 2)) / (torch.sqrt(2 * pi * (t_expiries))) - \
-                    t_cost_of_carries * t_strikes * torch.exp(-t_cost_of_carries * t_expiries) * torch.Tensor(
-                norm.cdf(d2))
-            return theta
-        if greek == 'vega':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            vega = t_spots * torch.sqrt(t_expiries) * torch.exp(-d1 ** 2 / 2)
-            return vega
-        if greek == 'rho':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            d2 = d1 - t_sqrt_var
-            rho = t_strikes * t_expiries * torch.exp(-t_cost_of_carries * t_expiries) * torch.Tensor(norm.cdf(d2))
-            return rho
-
-    if is_call_options == False:
-        if greek == 'delta':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            delta = torch.Tensor(norm.cdf(d1)) - 1
-            return delta
-        if greek == 'gamma':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            gamma = (torch.exp(-d1 ** 2 / 2)) / (torch.sqrt(2 * pi * (t_expiries)) * t_spots * t_volatilities)
-            return gamma
-        if greek == 'theta':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            d2 = d1 - t_sqrt_var
-            theta = -t_spots * t_volatilities * (torch.exp(-d1 ** 2 / 2)) / (torch.sqrt(2 * pi * (t_expiries))) + \
-                    t_cost_of_carries * t_strikes * torch.exp(-t_cost_of_carries * t_expiries) * torch.Tensor(
-                norm.cdf(-d2))
-            return theta
-        if greek == 'vega':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            vega = t_spots * torch.sqrt(t_expiries) * torch.exp(-d1 ** 2 / 2)
-            return vega
-        if greek == 'rho':
-            t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
-            d1 = (torch.log(t_forwards / t_strikes) + t_sqrt_var * t_sqrt_var / 2) / t_sqrt_var
-            d2 = d1 - t_sqrt_var
-            rho = -t_strikes * t_expiries * torch.exp(-t_cost_of_carries * t_expiries) * torch.Tensor(norm.cdf(-d2))
-            return rho
-    else:
-        raise ValueError('Variable \'is_call_options\' can only be Booleans ')
+        forwards = np.asarray(spots, dtype=np.float64) * np.exp(cost_of_carries * expiries)
+
+    strikes, volatilities, expiries, discount_factors, forwards = (
+        np.ascontiguousarray(a) for a in np.broadcast_arrays(
+            strikes, volatilities, expiries, discount_factors, forwards))
+    out = np.empty_like(strikes)
+    _bs_numba._bs_price_loop(strikes.ravel(), volatilities.ravel(),
+                             expiries.ravel(), discount_factors.ravel(),
+                             forwards.ravel(), bool(is_call), use_poly_cdf,
+                             out.ravel())
+    return torch.from_numpy(out).to(out_dtype)
+
+def get_vanilla_prices(*,
+                     strikes=None,
+                     volatilities=None,
+                     expiries=None,
+                     spots=None,
+                     forwards=None,
+                     discount_rates=None,
+                     continuous_dividends=None,
+                     cost_of_carries=None,
+                     discount_factors=None,
+                     is_call_options=True,
+                     cdf='ndtr',
+                     chunk_size=65536,
+                     context=None,
+                     device=None,
+                     dtype=None):
+    '''
+    Computes the Black Scholes price for a batch of call or put options.
+
+    context takes a precomputed bs_context(...) in place of the raw
+    market inputs; repeated queries on the same grid then skip the
+    normalization and the cached log/sqrt/exp invariants.
+
+    is_call_options may be a single Python bool or a broadcastable bool
+    tensor, so a mixed book of calls and puts prices in one fused pass
+    instead of two separate calls.
+
+    cdf selects the normal CDF implementation: 'ndtr' (default) uses
+    torch.special.ndtr, 'poly' uses the fusible Abramowitz-Stegun
+    polynomial, which wins on small launch-overhead-dominated batches at
+    ~1e-7 absolute accuracy.
+
+    chunk_size cache-blocks large CPU batches (set None to disable); the
+    block loop is skipped on GPU and whenever an input carries grad.
+
+    dtype picks the precision/throughput trade-off: float32 halves memory
+    traffic versus float64 (roughly 2x throughput on bandwidth-bound GPUs)
+    but loses accuracy for deep in/out-of-the-money or near-expiry options
+    where |d1| is large; use check_dtype_accuracy to quantify the gap.
+    '''
+    if (_bs_numba is not None and device is None and dtype is None
+            and isinstance(strikes, np.ndarray)
+            and isinstance(is_call_options, bool)):
+        _validate_args(spots, forwards, discount_rates, continuous_dividends,
+                       cost_of_carries, discount_factors)
+        return _vanilla_prices_numba(strikes, volatilities, expiries, spots,
+                                     forwards, discount_rates,
+                                     continuous_dividends, cost_of_carries,
+                                     discount_factors, is_call_options,
+                                     cdf == 'poly')
+
+    if context is None:
+        context = bs_context(
+            strikes=strikes, volatilities=volatilities, expiries=expiries,
+            spots=spots, forwards=forwards, discount_rates=discount_rates,
+            continuous_dividends=continuous_dividends,
+            cost_of_carries=cost_of_carries,
+            discount_factors=discount_factors, device=device, dtype=dtype)
+
+    is_call = torch.as_tensor(is_call_options, device=context.strikes.device)
+    t_log_moneyness = context.log_forwards - context.log_strikes
+
+    if (chunk_size is not None and context.strikes.device.type == 'cpu'
+            and context.strikes.numel() > chunk_size
+            and not any(t.requires_grad for t in (
+                context.strikes, context.volatilities,
+                context.sqrt_expiries, context.discount_factors,
+                context.forwards))):
+        return _bs_price_chunked(context.strikes, context.volatilities,
+                                 context.sqrt_expiries,
+                                 context.discount_factors, context.forwards,
+                                 t_log_moneyness, is_call,
+                                 cdf == 'poly', chunk_size)
+
+    return _bs_price_core(context.strikes, context.volatilities,
+                          context.sqrt_expiries, context.discount_factors,
+                          context.forwards, t_log_moneyness, is_call,
+                          cdf == 'poly')
+
+
+def check_dtype_accuracy(*,
+                         strikes,
+                         volatilities,
+                         expiries,
+                         spots=None,
+                         forwards=None,
+                         discount_rates=None,
+                         continuous_dividends=None,
+                         cost_of_carries=None,
+                         discount_factors=None,
+                         is_call_options=True,
+                         device=None):
+    '''
+    Prices the batch in both float32 and float64 and returns the largest
+    absolute difference. Warns when |d1| exceeds 8, where float32 ndtr
+    hits its ULP limit in the tails and float64 should be preferred.
+    '''
+    kwargs = dict(strikes=strikes, volatilities=volatilities,
+                  expiries=expiries, spots=spots, forwards=forwards,
+                  discount_rates=discount_rates,
+                  continuous_dividends=continuous_dividends,
+                  cost_of_carries=cost_of_carries,
+                  discount_factors=discount_factors,
+                  is_call_options=is_call_options, device=device)
+    prices_fp32 = get_vanilla_prices(dtype=torch.float32, **kwargs)
+    prices_fp64 = get_vanilla_prices(dtype=torch.float64, **kwargs)
+
+    (t_strikes, t_volatilities, t_expiries, t_discount_rates,
+     t_cost_of_carries, t_discount_factors, t_spots, t_forwards) = _prep(
+        strikes, volatilities, expiries, spots, forwards, discount_rates,
+        continuous_dividends, cost_of_carries, discount_factors, device,
+        torch.float64)
+    t_sqrt_var = t_volatilities * torch.sqrt(t_expiries)
+    d1 = (torch.log(t_forwards / t_strikes) + 0.5 * t_sqrt_var * t_sqrt_var) * torch.reciprocal(t_sqrt_var)
+    if bool((d1.abs() > 8).any()):
+        warnings.warn('Batch contains |d1| > 8; float32 loses the normal '
+                      'CDF tail there, consider dtype=torch.float64.')
+    return (prices_fp64 - prices_fp32.double()).abs().max()
+
+
+def _greeks_all_autograd(t_strikes, t_volatilities, t_expiries,
+                         t_discount_rates, t_cost_of_carries, t_spots,
+                         is_call, use_poly_cdf):
+    '''
+    Derives the greeks by differentiating the price with torch.autograd.
+    The forward is one fused core call; the backward reuses its graph, so
+    all five greeks cost roughly one extra pass.
+    '''
+    t_spots = t_spots.detach().requires_grad_(True)
+    t_volatilities = t_volatilities.detach().requires_grad_(True)
+    # Clamp expired rows off exactly zero: the backward of sqrt(T) is inf
+    # at 0 and torch.where turns the masked inf into NaN theta, even
+    # though the degenerate limit in the core prices those rows fine.
+    t_expiries = t_expiries.detach().clamp_min(_DEGENERATE_EPS).requires_grad_(True)
+    t_carry_spread = (t_cost_of_carries - t_discount_rates).detach()
+    t_discount_rates = t_discount_rates.detach().requires_grad_(True)
+    t_cost_of_carries = t_discount_rates + t_carry_spread
+
+    t_discount_factors = torch.exp(-t_discount_rates * t_expiries)
+    t_forwards = t_spots * torch.exp(t_cost_of_carries * t_expiries)
+    t_sqrt_expiries = torch.sqrt(t_expiries)
+    t_log_moneyness = torch.log(t_forwards) - torch.log(t_strikes)
+    price = _bs_price_core(t_strikes, t_volatilities, t_sqrt_expiries,
+                           t_discount_factors, t_forwards, t_log_moneyness,
+                           is_call, use_poly_cdf)
+
+    delta, vega, price_dt, rho = torch.autograd.grad(
+        price.sum(), [t_spots, t_volatilities, t_expiries, t_discount_rates],
+        create_graph=True)
+    gamma = torch.autograd.grad(delta.sum(), t_spots)[0]
+    return {'delta': delta.detach(), 'gamma': gamma.detach(),
+            'theta': -price_dt.detach(), 'vega': vega.detach(),
+            'rho': rho.detach()}
+
+
+def get_vanilla_greeks_all(*,
+                           strikes=None,
+                           volatilities=None,
+                           expiries=None,
+                           spots=None,
+                           forwards=None,
+                           discount_rates=None,
+                           continuous_dividends=None,
+                           cost_of_carries=None,
+                           discount_factors=None,
+                           is_call_options=True,
+                           method='analytic',
+                           cdf='ndtr',
+                           context=None,
+                           device=None,
+                           dtype=None):
+    '''
+    Computes all five Greeks of a batch of call or put plain vanilla
+    options in a single shared d1/d2/pdf pass and returns them as a dict
+    keyed 'delta', 'gamma', 'theta', 'vega', 'rho'. Roughly 5x cheaper
+    than five separate get_vanilla_greeks calls on memory-bound batches.
+    context takes a precomputed bs_context(...) in place of the raw
+    market inputs.
+
+    method='autograd' differentiates get_vanilla_prices itself instead of
+    using the hand-coded formulas; theta and rho are then the exact price
+    sensitivities (including discounting), which can differ from the
+    analytic conventions above.
+    '''
+    if method not in ('analytic', 'autograd'):
+        raise ValueError('Input method should be one of \'analytic\',\'autograd\'')
+    if cdf not in ('ndtr', 'poly'):
+        raise ValueError('Input cdf should be one of \'ndtr\',\'poly\'')
+
+    if context is None:
+        context = bs_context(
+            strikes=strikes, volatilities=volatilities, expiries=expiries,
+            spots=spots, forwards=forwards, discount_rates=discount_rates,
+            continuous_dividends=continuous_dividends,
+            cost_of_carries=cost_of_carries,
+            discount_factors=discount_factors, device=device, dtype=dtype)
+
+    is_call = torch.as_tensor(is_call_options, device=context.strikes.device)
+
+    if method == 'autograd':
+        return _greeks_all_autograd(context.strikes, context.volatilities,
+                                    context.expiries, context.discount_rates,
+                                    context.cost_of_carries, context.spots,
+                                    is_call, cdf == 'poly')
+
+    t_log_moneyness = context.log_forwards - context.log_strikes
+    delta, gamma, theta, vega, rho = _bs_greeks_core(
+        context.strikes, context.volatilities, context.expiries,
+        context.sqrt_expiries, context.cost_of_carries,
+        context.carry_discount, context.spots, t_log_moneyness,
+        is_call, cdf == 'poly')
+    return {'delta': delta, 'gamma': gamma, 'theta': theta,
+            'vega': vega, 'rho': rho}
+
+
+def get_vanilla_greeks(*,
+                       strikes=None,
+                       volatilities=None,
+                       expiries=None,
+                       greek,
+                       spots=None,
+                       forwards=None,
+                       discount_rates=None,
+                       continuous_dividends=None,
+                       cost_of_carries=None,
+                       discount_factors=None,
+                       is_call_options=True,
+                       method='analytic',
+                       cdf='ndtr',
+                       context=None,
+                       device=None,
+                       dtype=None):
+    '''
+    Computes the Greeks of a batch of call or put plain vanilla options.
+
+    greek may be a single name or a list of names; a list produces one
+    shared pass with the selected greeks stacked on a new leading
+    dimension in the order requested.
+    '''
+    greeks = [greek] if isinstance(greek, str) else list(greek)
+    for g in greeks:
+        if g not in ['delta', 'gamma', 'theta', 'vega', 'rho']:
+            raise ValueError('Input greek should be one of \'delta\',\'gamma\',\'theta\',\'vega\',\'rho\'')
 
+    all_greeks = get_vanilla_greeks_all(
+        strikes=strikes, volatilities=volatilities, expiries=expiries,
+        spots=spots, forwards=forwards, discount_rates=discount_rates,
+        continuous_dividends=continuous_dividends,
+        cost_of_carries=cost_of_carries, discount_factors=discount_factors,
+        is_call_options=is_call_options, method=method, cdf=cdf,
+        context=context, device=device, dtype=dtype)
+    if isinstance(greek, str):
+        return all_greeks[greek]
+    return torch.stack([all_greeks[g] for g in greeks])